@@ -0,0 +1,192 @@
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+# Adicionar o diretório src ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ReclameAqui.collector import download_s3_object_ranged
+
+MIB = 1024 * 1024
+
+
+def multipart_etag(data, upload_part_size=8 * MIB):
+    """
+    Calcula o ETag que o S3 gera para um multipart upload ("<md5 dos md5s>-N").
+    """
+    digests = b''.join(hashlib.md5(data[i:i + upload_part_size]).digest()
+                       for i in range(0, len(data), upload_part_size))
+    n_parts = -(-len(data) // upload_part_size)
+    return f'"{hashlib.md5(digests).hexdigest()}-{n_parts}"'
+
+
+class _FakeBody:
+    """
+    Corpo de resposta com a interface iter_chunks do StreamingBody do botocore.
+    """
+
+    def __init__(self, data, reset_after_first_chunk):
+        self.data = data
+        self.reset_after_first_chunk = reset_after_first_chunk
+
+    def iter_chunks(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            if self.reset_after_first_chunk and i > 0:
+                raise ConnectionResetError("conexão resetada (simulada)")
+            yield self.data[i:i + chunk_size]
+
+
+def _client_error(status, code, operation):
+    return ClientError({'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+                       operation)
+
+
+class FakeS3:
+    """
+    Stand-in local compatível com o subconjunto do client boto3 usado pelo collector
+    (head_object com PartNumber e get_object com Range/IfMatch).
+
+    Simula latência por requisição, resets de conexão no meio de uma parte,
+    erros HTTP permanentes, substituição do objeto durante o download e
+    objetos enviados por multipart upload com qualquer tamanho de parte.
+    """
+
+    def __init__(self, data, latency=0.05, fail_rate=0.0, upload_part_size=None, etag=None,
+                 supports_part_number=True, always_fail_start=None, fail_status=None, seed=0):
+        self.data = data
+        self.upload_part_size = upload_part_size
+        if etag is None:
+            etag = multipart_etag(data, upload_part_size) if upload_part_size else f'"{hashlib.md5(data).hexdigest()}"'
+        self.etag = etag
+        self.supports_part_number = supports_part_number
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.always_fail_start = always_fail_start
+        self.fail_status = fail_status
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def replace_object(self, data):
+        """Simula um novo upload do objeto (muda o ETag)."""
+        self.data = data
+        self.upload_part_size = None
+        self.etag = f'"{hashlib.md5(data).hexdigest()}"'
+
+    def head_object(self, Bucket, Key, PartNumber=None):
+        if PartNumber is None:
+            return {'ContentLength': len(self.data), 'ETag': self.etag}
+        if not self.supports_part_number:
+            raise _client_error(400, 'InvalidArgument', 'HeadObject')
+        part_size = self.upload_part_size or len(self.data)
+        part = self.data[(PartNumber - 1) * part_size:PartNumber * part_size]
+        return {'ContentLength': len(part), 'PartsCount': -(-len(self.data) // part_size),
+                'ETag': f'"{hashlib.md5(part).hexdigest()}"'}
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.fail_rate
+        time.sleep(self.latency)
+        if IfMatch is not None and IfMatch != self.etag:
+            raise _client_error(412, 'PreconditionFailed', 'GetObject')
+        start, end = map(int, Range[len('bytes='):].split('-'))
+        if start == self.always_fail_start:
+            if self.fail_status is not None:
+                raise _client_error(self.fail_status, 'AccessDenied', 'GetObject')
+            raise ConnectionResetError("parte sempre falha (simulada)")
+        return {'Body': _FakeBody(self.data[start:end + 1], fail)}
+
+
+def _expect_error(error_type, func):
+    try:
+        func()
+    except error_type as e:
+        return e
+    raise AssertionError(f"esperava {error_type.__name__}")
+
+
+def main():
+    """
+    Verifica o download paralelo por ranges contra o FakeS3.
+
+    Uso (a partir de src/):
+        python -m ReclameAqui.check_ranged_download
+    """
+    data = random.Random(1).randbytes(40 * MIB + 123)
+
+    print("⏱️ Concorrência (100 ms de latência por requisição, partes de 2 MiB)")
+    timings = {}
+    for concurrency in (1, 8):
+        start_time = time.time()
+        result = download_s3_object_ranged('bucket', 'key', part_size=2 * MIB, max_concurrency=concurrency,
+                                           s3_client=FakeS3(data, latency=0.1))
+        timings[concurrency] = time.time() - start_time
+        assert result == data
+    print(f"   1 conexão: {timings[1]:.2f}s | 8 conexões: {timings[8]:.2f}s")
+    assert timings[8] < timings[1] / 2
+
+    print("\n🔁 Retry por parte (30% das partes com reset de conexão)")
+    fake = FakeS3(data, latency=0.01, fail_rate=0.3)
+    result = download_s3_object_ranged('bucket', 'key', part_size=4 * MIB, max_retries=8, s3_client=fake)
+    assert result == data
+    print(f"   {fake.calls} GETs para 11 partes")
+    assert fake.calls > 11
+
+    print("\n🔐 Checksum de ETag multipart")
+    etag = multipart_etag(data)
+    assert download_s3_object_ranged('bucket', 'key', s3_client=FakeS3(data, latency=0, upload_part_size=8 * MIB)) == data
+    corrupted = bytearray(data)
+    corrupted[5 * MIB] ^= 0x01
+    error = _expect_error(IOError, lambda: download_s3_object_ranged(
+        'bucket', 'key', s3_client=FakeS3(bytes(corrupted), latency=0, upload_part_size=8 * MIB, etag=etag)))
+    print(f"   Bit trocado detectado: {error}")
+
+    # Upload com partes de 16 MiB (nem 8 MiB nem o part_size do download): o
+    # palpite size/N (15 MiB) também produz 7 partes e não pode reprovar o arquivo
+    big = random.Random(2).randbytes(100 * MIB)
+    assert download_s3_object_ranged('bucket', 'key', part_size=2 * MIB,
+                                     s3_client=FakeS3(big, latency=0, upload_part_size=16 * MIB)) == big
+    print("   Upload em partes de 16 MiB (ETag -7) verificado via PartNumber=1")
+    assert download_s3_object_ranged('bucket', 'key', part_size=2 * MIB, s3_client=FakeS3(
+        big, latency=0, upload_part_size=16 * MIB, supports_part_number=False)) == big
+    print("   Sem PartNumber: palpite não confere, aviso e arquivo aceito")
+
+    print("\n♻️ Objeto substituído durante o download")
+    fake = FakeS3(data, latency=0.05)
+    threading.Timer(0.1, fake.replace_object, args=(data[::-1],)).start()
+    error = _expect_error(IOError, lambda: download_s3_object_ranged(
+        'bucket', 'key', part_size=MIB, max_concurrency=2, s3_client=fake))
+    print(f"   {error}")
+
+    print("\n🛑 Parte com falha permanente cancela as pendentes")
+    fake = FakeS3(data, latency=0.05, always_fail_start=0)
+    start_time = time.time()
+    _expect_error(ConnectionResetError, lambda: download_s3_object_ranged(
+        'bucket', 'key', part_size=MIB, max_concurrency=2, max_retries=2, s3_client=fake))
+    print(f"   Falhou em {time.time() - start_time:.2f}s após {fake.calls} de 41 GETs")
+    assert fake.calls < 41
+
+    print("\n🚫 Erro 4xx não é re-tentado")
+    fake = FakeS3(data, latency=0, always_fail_start=0, fail_status=403)
+    start_time = time.time()
+    error = _expect_error(ClientError, lambda: download_s3_object_ranged(
+        'bucket', 'key', part_size=64 * MIB, max_retries=3, s3_client=fake))
+    print(f"   {error.response['Error']['Code']} em {time.time() - start_time:.2f}s após {fake.calls} GET")
+    assert fake.calls == 1
+
+    print("\n⚙️ Validação de parâmetros")
+    for kwargs in ({'max_retries': 0}, {'part_size': -1}, {'max_concurrency': 0}):
+        _expect_error(ValueError, lambda: download_s3_object_ranged('bucket', 'key', s3_client=FakeS3(data), **kwargs))
+    print("   max_retries=0, part_size=-1 e max_concurrency=0 rejeitados")
+
+    print("\n✅ Todas as verificações passaram")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,314 @@
 import pandas as pd
 import io
+import os
 import pickle
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from botocore.exceptions import BotoCoreError
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 from vincicompass import s3_manager as s3
 
 
-def get_all_companies_from_s3(bucket_name='datascience-studies-files', file_key='repo_data/ReclameAqui/all_companies_full.pkl'):
+DEFAULT_PART_SIZE = 64 * 1024 * 1024  # 64 MiB por range GET
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 3
+
+
+def get_s3_client(bucket_name):
+    """
+    Retorna o client boto3 do S3Manager do vincicompass para o bucket.
+
+    Usar o client do próprio S3Manager garante as mesmas credenciais, região e
+    endpoint do download anterior (get_file_bytes). O client do boto3 é
+    thread-safe; o pool padrão do botocore tem 10 conexões, suficiente para
+    DEFAULT_MAX_CONCURRENCY.
+
+    A variável de ambiente S3_ENDPOINT_URL aponta para um serviço compatível
+    com S3 local (ex: MinIO) em testes, ignorando o S3Manager.
+
+    Returns:
+        Client boto3, ou None se o S3Manager não expõe um client
+    """
+    endpoint_url = os.getenv('S3_ENDPOINT_URL')
+    if endpoint_url:
+        import boto3
+        return boto3.client('s3', endpoint_url=endpoint_url)
+
+    manager = s3.S3Manager(bucket_name)
+    for attr in vars(manager).values():
+        # Aceita tanto um client quanto um resource do boto3
+        client = getattr(getattr(attr, 'meta', None), 'client', attr)
+        service_model = getattr(getattr(client, 'meta', None), 'service_model', None)
+        if getattr(service_model, 'service_name', None) == 's3':
+            return client
+    return None
+
+
+def _is_precondition_failed(error):
+    """
+    Verifica se o erro é um HTTP 412 (objeto alterado desde o head_object).
+    """
+    response = getattr(error, 'response', None) or {}
+    return (response.get('Error', {}).get('Code') == 'PreconditionFailed'
+            or response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 412)
+
+
+def _is_retryable(error):
+    """
+    Verifica se vale tentar a parte de novo: erros de transporte (conexão,
+    timeout, leitura incompleta), respostas 5xx e throttling do S3. Erros 4xx
+    (AccessDenied, NoSuchKey...) são permanentes.
+    """
+    response = getattr(error, 'response', None)
+    if response is None:
+        return isinstance(error, (OSError, BotoCoreError, Urllib3HTTPError))
+    status = response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+    return status >= 500 or response.get('Error', {}).get('Code') in ('SlowDown', 'RequestTimeout')
+
+
+def _download_part(s3_client, bucket_name, file_key, etag, buffer, start, end, max_retries, cancel_event):
+    """
+    Baixa o intervalo [start, end] do objeto direto para a fatia correspondente do buffer.
+
+    O GET usa IfMatch com o ETag do head_object, então todas as partes vêm da
+    mesma versão do objeto; se ele for substituído no meio do download, a
+    parte falha na hora (sem retry). Erros de transporte, 5xx e respostas
+    incompletas são re-tentados apenas nesta parte; erros 4xx sobem direto.
+    """
+    expected = end - start + 1
+    for attempt in range(1, max_retries + 1):
+        try:
+            response = s3_client.get_object(
+                Bucket=bucket_name,
+                Key=file_key,
+                Range=f"bytes={start}-{end}",
+                IfMatch=etag
+            )
+            pos = start
+            for chunk in response['Body'].iter_chunks(chunk_size=1024 * 1024):
+                if cancel_event.is_set():
+                    raise IOError("download cancelado")
+                if pos + len(chunk) > end + 1:
+                    raise IOError(f"parte {start}-{end} retornou mais bytes que o esperado")
+                buffer[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+            if pos - start != expected:
+                raise IOError(f"parte {start}-{end} incompleta: {pos - start}/{expected} bytes")
+            return expected
+        except Exception as e:
+            if _is_precondition_failed(e):
+                raise IOError(f"{file_key} foi alterado durante o download (ETag {etag} não confere)") from e
+            if attempt == max_retries or cancel_event.is_set() or not _is_retryable(e):
+                raise
+            print(f"⚠️ Erro na parte {start}-{end} (tentativa {attempt}/{max_retries}): {e}")
+            time.sleep(2 ** (attempt - 1))
+
+
+def _multipart_etag_matches(buffer, etag_hash, upload_part_size):
+    """
+    Calcula o MD5 dos MD5s das partes de upload_part_size bytes e compara com o ETag.
+    """
+    view = memoryview(buffer)
+    digests = b''.join(
+        hashlib.md5(view[i:i + upload_part_size]).digest()
+        for i in range(0, len(buffer), upload_part_size)
+    )
+    return hashlib.md5(digests).hexdigest() == etag_hash
+
+
+def _get_upload_part_size(s3_client, bucket_name, file_key, etag):
+    """
+    Retorna o tamanho de parte usado no multipart upload (tamanho da parte 1),
+    ou None se não for possível obtê-lo ou se o PartsCount não bater com o ETag.
+    """
+    n_parts = int(etag.strip('"').split('-')[1])
+    try:
+        part = s3_client.head_object(Bucket=bucket_name, Key=file_key, PartNumber=1)
+    except Exception as e:
+        print(f"⚠️ Não foi possível consultar a parte 1 do upload: {e}")
+        return None
+    if part.get('PartsCount', n_parts) != n_parts:
+        print(f"⚠️ PartsCount {part.get('PartsCount')} não bate com o ETag {etag}")
+        return None
+    return part['ContentLength']
+
+
+def _verify_etag(buffer, etag, upload_part_size=None):
+    """
+    Verifica o conteúdo baixado contra o ETag do S3.
+
+    ETag simples é o MD5 do objeto; ETag de multipart upload ("<md5>-N") é o
+    MD5 dos MD5s das partes. Com o tamanho real de parte do upload (obtido
+    via head_object com PartNumber=1) a verificação é estrita. Sem ele, tenta
+    os tamanhos mais comuns (8 MiB do boto3 e size/N arredondado para MiB);
+    como é só um palpite, não conferir não é tratado como corrupção.
+
+    Returns:
+        bool: True se verificado, False se não foi possível verificar
+
+    Raises:
+        IOError: Se o conteúdo não confere com o ETag (MD5 ou tamanho de parte conhecido)
+    """
+    etag = etag.strip('"')
+    if '-' not in etag:
+        digest = hashlib.md5(buffer).hexdigest()
+        if digest != etag:
+            raise IOError(f"checksum inválido: MD5 {digest} != ETag {etag}")
+        return True
+
+    etag_hash, n_parts = etag.split('-')
+    n_parts = int(n_parts)
+    size = len(buffer)
+
+    if upload_part_size is not None:
+        if upload_part_size <= 0 or -(-size // upload_part_size) != n_parts:
+            raise IOError(f"tamanho inconsistente: {size} bytes não formam {n_parts} partes de {upload_part_size}")
+        if not _multipart_etag_matches(buffer, etag_hash, upload_part_size):
+            raise IOError(f"checksum inválido: ETag {etag} não confere (partes de {upload_part_size} bytes)")
+        return True
+
+    mib = 1024 * 1024
+    candidates = [8 * mib, -(-size // n_parts // mib) * mib if n_parts > 1 else size]
+    for candidate in dict.fromkeys(candidates):
+        if candidate > 0 and -(-size // candidate) == n_parts and _multipart_etag_matches(buffer, etag_hash, candidate):
+            return True
+    return False
+
+
+def _verify_sha256(buffer, expected_sha256):
+    """
+    Verifica o conteúdo contra um SHA-256 hex esperado.
+    """
+    digest = hashlib.sha256(buffer).hexdigest()
+    if digest != expected_sha256:
+        raise IOError(f"checksum inválido: SHA-256 {digest} != {expected_sha256}")
+
+
+def download_s3_object_ranged(bucket_name, file_key, part_size=DEFAULT_PART_SIZE,
+                              max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                              max_retries=DEFAULT_MAX_RETRIES, s3_client=None,
+                              expected_sha256=None):
+    """
+    Baixa um objeto do S3 com range GETs concorrentes direto em um buffer pré-alocado.
+
+    Cada parte é escrita na sua fatia do buffer (sem concatenação de chunks) e
+    falhas são re-tentadas apenas na parte que falhou. Ao final, o conteúdo é
+    verificado contra o ETag e, se informado, contra expected_sha256.
+
+    Args:
+        bucket_name (str): Nome do bucket S3
+        file_key (str): Caminho do arquivo no bucket
+        part_size (int): Tamanho de cada range GET em bytes
+        max_concurrency (int): Número de downloads simultâneos
+        max_retries (int): Tentativas por parte antes de desistir
+        s3_client: Client boto3 (ou compatível); criado via get_s3_client se None
+        expected_sha256 (str): SHA-256 hex esperado do objeto (opcional)
+
+    Returns:
+        bytearray: Conteúdo completo do objeto
+
+    Raises:
+        ValueError: Se part_size, max_concurrency ou max_retries forem inválidos
+        RuntimeError: Se s3_client não foi informado e o S3Manager não expõe um client
+        IOError: Se o objeto mudar durante o download ou o checksum não conferir
+        botocore.exceptions.ClientError: Erros 4xx (ex: AccessDenied, NoSuchKey),
+            sem retry, ou 5xx após esgotar as tentativas
+        Erros de transporte (OSError, BotoCoreError, urllib3) após esgotar as tentativas
+    """
+    if part_size <= 0:
+        raise ValueError(f"part_size deve ser positivo: {part_size}")
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency deve ser >= 1: {max_concurrency}")
+    if max_retries < 1:
+        raise ValueError(f"max_retries deve ser >= 1: {max_retries}")
+
+    if s3_client is None:
+        s3_client = get_s3_client(bucket_name)
+        if s3_client is None:
+            raise RuntimeError("S3Manager não expõe um client boto3; informe s3_client explicitamente")
+
+    head = s3_client.head_object(Bucket=bucket_name, Key=file_key)
+    size = head['ContentLength']
+    upload_part_size = None
+    if expected_sha256 is None and '-' in head['ETag'] and head.get('ServerSideEncryption') != 'aws:kms':
+        upload_part_size = _get_upload_part_size(s3_client, bucket_name, file_key, head['ETag'])
+    buffer = bytearray(size)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+    print(f"   {size / 1024 ** 2:,.1f} MB em {len(ranges)} partes ({max_concurrency} conexões)")
+
+    start_time = time.time()
+    cancel_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        futures = [
+            executor.submit(_download_part, s3_client, bucket_name, file_key, head['ETag'],
+                            buffer, start, end, max_retries, cancel_event)
+            for start, end in ranges
+        ]
+        downloaded = sum(future.result() for future in as_completed(futures))
+    except BaseException:
+        # Uma parte falhou de vez: cancela as pendentes e interrompe as em andamento
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    elapsed = time.time() - start_time
+    rate = downloaded / 1024 ** 2 / elapsed if elapsed > 0 else 0
+    print(f"   Download concluído em {elapsed:.1f}s ({rate:,.1f} MB/s)")
+
+    if expected_sha256 is not None:
+        _verify_sha256(buffer, expected_sha256)
+    elif head.get('ServerSideEncryption') == 'aws:kms':
+        # Com SSE-KMS o ETag não é o MD5 do conteúdo
+        print("⚠️ Objeto com SSE-KMS: ETag não verificável, checksum ignorado")
+    elif not _verify_etag(buffer, head['ETag'], upload_part_size):
+        print(f"⚠️ Não foi possível determinar o tamanho de parte do ETag {head['ETag']}, checksum ignorado")
+
+    return buffer
+
+
+def get_all_companies_from_s3(bucket_name='datascience-studies-files', file_key='repo_data/ReclameAqui/all_companies_full.pkl',
+                              part_size=DEFAULT_PART_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                              max_retries=DEFAULT_MAX_RETRIES, s3_client=None, expected_sha256=None):
     """
     Busca a base completa de reclamações do S3.
+
+    Usa o download paralelo por ranges; se o S3Manager não expõe um client
+    boto3, volta para o download em stream único (S3Manager.get_file_bytes).
     
     Args:
         bucket_name (str): Nome do bucket S3
         file_key (str): Caminho do arquivo no bucket
-        
+        part_size (int): Tamanho de cada parte do download paralelo em bytes
+        max_concurrency (int): Número de partes baixadas simultaneamente
+        max_retries (int): Tentativas por parte antes de desistir
+        s3_client: Client boto3 (ou compatível); útil para apontar para um S3 local
+        expected_sha256 (str): SHA-256 hex esperado do arquivo (opcional)
+    
     Returns:
         pd.DataFrame: DataFrame com todas as reclamações
     """
     print(f"📥 Buscando dados do S3: {bucket_name}/{file_key}")
-    s3_client = s3.S3Manager(bucket_name)
-    file_bytes = s3_client.get_file_bytes(file_key)
+    if s3_client is None:
+        s3_client = get_s3_client(bucket_name)
+    if s3_client is None:
+        print("⚠️ S3Manager não expõe um client boto3, usando download em stream único")
+        file_bytes = s3.S3Manager(bucket_name).get_file_bytes(file_key)
+        if expected_sha256 is not None:
+            _verify_sha256(file_bytes, expected_sha256)
+    else:
+        file_bytes = download_s3_object_ranged(
+            bucket_name,
+            file_key,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            max_retries=max_retries,
+            s3_client=s3_client,
+            expected_sha256=expected_sha256
+        )
     df = pickle.loads(file_bytes)
     print(f"✅ {len(df)} registros carregados do S3")
     return df
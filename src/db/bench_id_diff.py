@@ -0,0 +1,145 @@
+import argparse
+import gc
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+import mongoengine
+import pandas as pd
+from dotenv import load_dotenv
+load_dotenv()
+
+# Adicionar o diretório src ao path para importar os módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.db_connection import mongoDBConnection
+from db.models.AllCompanies import AllCompanies
+
+PRODUCTION_DB = "reclameAqui-db"
+PARAMS_COLLECTION = "bench_id_diff_params"
+
+
+def build_ids(n_ids, missing_frac, n_stale, seed):
+    """
+    Gera IDs sintéticos: (IDs do S3, IDs a gravar no MongoDB).
+    Uma fração dos IDs do S3 fica fora do MongoDB (faltantes) e o MongoDB
+    recebe n_stale IDs que não existem no S3.
+    """
+    rnd = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits
+    s3_ids = [''.join(rnd.choices(alphabet, k=24)) for _ in range(n_ids)]
+    n_present = int(n_ids * (1 - missing_frac))
+    mongo_ids = s3_ids[:n_present] + [f"stale-{i:08d}" for i in range(n_stale)]
+    rnd.shuffle(mongo_ids)
+    return s3_ids, mongo_ids
+
+
+def seed_collection(mongo_ids, params, chunk_size=50000):
+    """
+    (Re)cria a coleção de benchmark apenas com o campo _id.
+
+    Os parâmetros de geração ficam gravados em PARAMS_COLLECTION; a coleção
+    só é reutilizada (ex: após --keep) se eles forem idênticos aos atuais.
+    """
+    collection = AllCompanies._get_collection()
+    params_collection = AllCompanies._get_db()[PARAMS_COLLECTION]
+    stored = params_collection.find_one({'_id': 'params'}, {'_id': 0})
+    if stored == params and collection.estimated_document_count() == len(mongo_ids):
+        print(f"   Coleção já populada com os mesmos parâmetros ({len(mongo_ids):,} IDs), reutilizando")
+        return
+    params_collection.drop()
+    collection.drop()
+    for i in range(0, len(mongo_ids), chunk_size):
+        collection.insert_many([{'_id': _id} for _id in mongo_ids[i:i + chunk_size]], ordered=False)
+    params_collection.insert_one({'_id': 'params', **params})
+    print(f"   {len(mongo_ids):,} IDs inseridos")
+
+
+def run_engine(engine, df, batch_size, trace_memory):
+    """
+    Executa um engine de diff e retorna (segundos, pico em MB ou None, missing, stale).
+    """
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    if engine == 'merge':
+        missing_ids, stale_ids = AllCompanies._find_missing_ids_merge(df, batch_size=batch_size, collect_stale=True)
+    else:
+        missing_ids, stale_ids = AllCompanies._find_missing_ids_set(df, collect_stale=True)
+    elapsed = time.perf_counter() - start_time
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+    return elapsed, peak, missing_ids, stale_ids
+
+
+def main():
+    """
+    Benchmark dos engines de diff de IDs ('set' x 'merge') contra um mongod real.
+
+    Popula uma coleção all_companies_full em um banco descartável com IDs
+    sintéticos e mede tempo (sem tracemalloc) e pico de memória Python
+    (com tracemalloc) de cada engine, incluindo a leitura do MongoDB.
+
+    Uso (a partir de src/, com CONNECTION_URL definido):
+        python -m db.bench_id_diff --n-ids 3000000
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__.strip().splitlines()[0])
+    parser.add_argument('--n-ids', type=int, default=1_000_000)
+    parser.add_argument('--missing-frac', type=float, default=0.05)
+    parser.add_argument('--n-stale', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--db', default='reclameAqui-bench')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true', help='Não apagar a coleção ao final')
+    args = parser.parse_args()
+
+    if args.db == PRODUCTION_DB:
+        sys.exit(f"❌ Recusando rodar o benchmark no banco de produção ({PRODUCTION_DB})")
+
+    db_connection = mongoDBConnection(args.db)
+    mongoengine.connect(db=args.db, host=db_connection.connection_string)
+
+    print(f"🧪 Gerando {args.n_ids:,} IDs sintéticos...")
+    s3_ids, mongo_ids = build_ids(args.n_ids, args.missing_frac, args.n_stale, args.seed)
+    df = pd.DataFrame({'id': s3_ids})
+    del s3_ids
+    params = {
+        'n_ids': args.n_ids,
+        'missing_frac': args.missing_frac,
+        'n_stale': args.n_stale,
+        'seed': args.seed,
+    }
+    seed_collection(mongo_ids, params)
+    del mongo_ids
+
+    try:
+        results = {}
+        for engine in ('set', 'merge'):
+            print(f"\n⏱️ Engine '{engine}' (tempo)...")
+            elapsed, _, missing_ids, stale_ids = run_engine(engine, df, args.batch_size, trace_memory=False)
+            print(f"\n📈 Engine '{engine}' (memória)...")
+            _, peak, _, _ = run_engine(engine, df, args.batch_size, trace_memory=True)
+            results[engine] = (elapsed, peak, set(missing_ids), set(stale_ids))
+
+        assert results['set'][2] == results['merge'][2], "engines divergem nos IDs faltantes"
+        assert results['set'][3] == results['merge'][3], "engines divergem nos IDs stale"
+
+        print("\n" + "=" * 60)
+        print(f"{'engine':<8}{'tempo (s)':>12}{'pico (MB)':>12}{'faltantes':>14}{'stale':>10}")
+        for engine, (elapsed, peak, missing_ids, stale_ids) in results.items():
+            print(f"{engine:<8}{elapsed:>12.2f}{peak:>12.0f}{len(missing_ids):>14,}{len(stale_ids):>10,}")
+        print("=" * 60)
+    finally:
+        if not args.keep:
+            AllCompanies._get_collection().drop()
+            AllCompanies._get_db()[PARAMS_COLLECTION].drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -157,58 +157,213 @@ class AllCompanies(mongoengine.Document):
             return None
 
     @classmethod
-    def incremental_update_from_df(cls, df, force_full_sync=False):
+    def _iter_existing_id_batches(cls, batch_size=10000):
+        """
+        Itera sobre os IDs do MongoDB em ordem crescente de _id, em lotes.
+
+        Usa o índice primário (_id) com projeção apenas do _id, então a
+        consulta é coberta pelo índice e nunca carrega documentos completos.
+
+        Args:
+            batch_size (int): Quantidade de IDs por lote (e por round-trip)
+
+        Yields:
+            np.ndarray: Array (dtype=object) de IDs ordenados
+        """
+        import numpy as np
+
+        cursor = (
+            cls._get_collection()
+            .find({}, {'_id': 1})
+            .sort('_id', 1)
+            .hint([('_id', 1)])
+            .batch_size(batch_size)
+        )
+        batch = []
+        for doc in cursor:
+            batch.append(doc['_id'])
+            if len(batch) >= batch_size:
+                yield np.array(batch, dtype=object)
+                batch = []
+        if batch:
+            yield np.array(batch, dtype=object)
+
+    @staticmethod
+    def _merge_join_ids(source_ids, existing_id_batches, collect_stale=False):
+        """
+        Merge-join entre IDs do S3 (ordenados) e lotes ordenados de IDs do MongoDB.
+
+        Os IDs do S3 ficam em um único array numpy ordenado; os do MongoDB são
+        consumidos em streaming, então a memória fica limitada ao array do S3,
+        uma máscara booleana e um lote do MongoDB (sem sets com milhões de IDs).
+
+        Args:
+            source_ids (np.ndarray): IDs do S3 ordenados e sem duplicatas
+            existing_id_batches (iterable): Lotes ordenados de IDs do MongoDB
+            collect_stale (bool): Se True, também retorna IDs que estão no
+                MongoDB mas não existem mais no S3
+
+        Returns:
+            tuple: (missing_ids, stale_ids, existing_count) - stale_ids é None
+            quando collect_stale=False
+        """
+        import numpy as np
+
+        found = np.zeros(len(source_ids), dtype=bool)
+        stale = [] if collect_stale else None
+        existing_count = 0
+        lo = 0
+
+        for batch in existing_id_batches:
+            existing_count += len(batch)
+            if lo >= len(source_ids):
+                # IDs do S3 esgotados: o restante do MongoDB só interessa como "stale"
+                if collect_stale:
+                    stale.append(batch)
+                continue
+
+            # Janela do S3 que pode conter os IDs deste lote (avança monotonicamente)
+            hi = lo + np.searchsorted(source_ids[lo:], batch[-1], side='right')
+            window = source_ids[lo:hi]
+
+            pos = np.searchsorted(window, batch)
+            in_range = pos < len(window)
+            matched = np.zeros(len(batch), dtype=bool)
+            matched[in_range] = window[pos[in_range]] == batch[in_range]
+            found[lo + pos[matched]] = True
+
+            if collect_stale and not matched.all():
+                stale.append(batch[~matched])
+            lo = hi
+
+        missing_ids = source_ids[~found]
+        if collect_stale:
+            stale = np.concatenate(stale) if stale else np.array([], dtype=object)
+        return missing_ids, stale, existing_count
+
+    @classmethod
+    def _find_missing_ids_set(cls, df, collect_stale=False):
+        """
+        Calcula os IDs faltantes no MongoDB via set-difference em memória.
+
+        Mantém todos os IDs do MongoDB e do S3 em dois sets ao mesmo tempo.
+        Os IDs do S3 são convertidos para str, como o _id (StringField) no MongoDB.
+
+        Returns:
+            tuple: (missing_ids, stale_ids) - listas sem ordem definida;
+            stale_ids é None quando collect_stale=False
+        """
+        # Usar aggregation com allowDiskUse para evitar limite de memória
+        pipeline = [
+            {"$project": {"_id": 1}},
+        ]
+        cursor = cls._get_collection().aggregate(pipeline, allowDiskUse=True)
+        existing_ids = set(doc['_id'] for doc in cursor)
+        print(f"   IDs no MongoDB: {len(existing_ids):,}")
+
+        s3_ids = set(df['id'].dropna().astype(str).unique())
+        print(f"   IDs no S3: {len(s3_ids):,}")
+
+        stale_ids = None
+        if collect_stale:
+            stale_ids = list(existing_ids - s3_ids)
+            print(f"🗑️ {len(stale_ids):,} IDs no MongoDB que não existem mais no S3")
+        return list(s3_ids - existing_ids), stale_ids
+
+    @classmethod
+    def _find_missing_ids_merge(cls, df, batch_size=10000, collect_stale=False):
+        """
+        Calcula os IDs faltantes no MongoDB via merge-join ordenado em streaming.
+
+        Alternativa ao set-difference: ordena os IDs do S3 uma única vez
+        (np.unique, sem hashing) e percorre o _id do MongoDB em ordem. Os IDs
+        do S3 são convertidos para str, como o _id (StringField) no MongoDB,
+        o que também evita TypeError ao ordenar tipos misturados.
+
+        Args:
+            batch_size (int): Quantidade de IDs do MongoDB por lote do cursor
+
+        Returns:
+            tuple: (missing_ids, stale_ids) - listas ordenadas;
+            stale_ids é None quando collect_stale=False
+        """
+        import numpy as np
+
+        s3_ids = np.unique(df['id'].dropna().astype(str).to_numpy(dtype=object))
+        print(f"   IDs no S3: {len(s3_ids):,}")
+
+        missing_ids, stale_ids, existing_count = cls._merge_join_ids(
+            s3_ids,
+            cls._iter_existing_id_batches(batch_size),
+            collect_stale=collect_stale
+        )
+        print(f"   IDs no MongoDB: {existing_count:,}")
+        if collect_stale:
+            print(f"🗑️ {len(stale_ids):,} IDs no MongoDB que não existem mais no S3")
+            stale_ids = stale_ids.tolist()
+        return missing_ids.tolist(), stale_ids
+
+    @classmethod
+    def incremental_update_from_df(cls, df, force_full_sync=False, diff_engine='set',
+                                   diff_batch_size=10000, collect_stale=False):
         """
         Atualiza o MongoDB com dados do DataFrame usando comparação por ID.
         
         Estratégia:
-        1. Busca todos os IDs existentes no MongoDB usando aggregation (evita limite de 16MB)
-        2. Compara com IDs do DataFrame
+        1. Busca os IDs existentes no MongoDB, conforme diff_engine:
+           - 'set': aggregation com allowDiskUse (evita limite de 16MB) para um set em memória
+           - 'merge': cursor ordenado pelo índice _id, em lotes de diff_batch_size
+        2. Compara com IDs do DataFrame (convertidos para str, como o _id)
         3. Insere apenas registros que não existem (baseado em ID)
         
         Args:
             df (pd.DataFrame): DataFrame com todos os dados do S3
             force_full_sync (bool): Se True, processa todos os registros (upsert)
-            
+            diff_engine (str): 'set' (set-difference em memória) ou 'merge'
+                (merge-join ordenado em streaming, memória limitada)
+            diff_batch_size (int): IDs por lote do cursor do MongoDB (apenas 'merge')
+            collect_stale (bool): Se True, inclui em stats['stale_ids'] (list) os
+                IDs do MongoDB que não estão mais no S3 - ordenados com 'merge',
+                sem ordem definida com 'set'
+        
         Returns:
             dict: Estatísticas da atualização
         """
         print("🔄 Iniciando atualização baseada em ID...")
         
+        if diff_engine not in ('set', 'merge'):
+            raise ValueError(f"diff_engine inválido: {diff_engine!r} (use 'set' ou 'merge')")
+        
         try:
-            # 1. Buscar IDs existentes no MongoDB usando cursor (evita limite de 16MB do distinct)
+            # 1-2. Buscar IDs existentes no MongoDB e identificar os que estão no S3 mas não no MongoDB
             print("📊 Buscando IDs existentes no MongoDB...")
             
-            # Usar aggregation com allowDiskUse para evitar limite de memória
-            pipeline = [
-                {"$project": {"_id": 1}},
-            ]
-            cursor = cls._get_collection().aggregate(pipeline, allowDiskUse=True)
-            existing_ids = set(doc['_id'] for doc in cursor)
-            print(f"   IDs no MongoDB: {len(existing_ids):,}")
-            
-            # 2. Identificar IDs que estão no S3 mas não no MongoDB
-            s3_ids = set(df['id'].dropna().unique())
-            print(f"   IDs no S3: {len(s3_ids):,}")
-            
-            missing_ids = s3_ids - existing_ids
+            if diff_engine == 'merge':
+                missing_ids, stale_ids = cls._find_missing_ids_merge(
+                    df, batch_size=diff_batch_size, collect_stale=collect_stale
+                )
+            else:
+                missing_ids, stale_ids = cls._find_missing_ids_set(df, collect_stale=collect_stale)
             print(f"🆕 {len(missing_ids):,} registros novos encontrados (IDs que faltam no MongoDB)")
             
             if len(missing_ids) == 0 and not force_full_sync:
                 print("✅ Base já está atualizada!")
-                return {
+                stats = {
                     'new_records': 0,
                     'updated_records': 0,
                     'errors': 0,
                     'total_processed': 0
                 }
+                if stale_ids is not None:
+                    stats['stale_ids'] = stale_ids
+                return stats
             
             # 3. Filtrar apenas registros que precisam ser inseridos
             if force_full_sync:
                 df_to_process = df.copy()
                 print(f"⚠️ Full sync ativado - processando todos os {len(df_to_process):,} registros")
             else:
-                df_to_process = df[df['id'].isin(missing_ids)].copy()
+                df_to_process = df[df['id'].notna() & df['id'].astype(str).isin(missing_ids)].copy()
                 print(f"📋 Processando {len(df_to_process):,} registros faltantes")
             
             # 2. Processar registros em lotes usando bulk operations (MUITO MAIS RÁPIDO!)
@@ -285,6 +440,8 @@ class AllCompanies(mongoengine.Document):
                 'errors': errors,
                 'total_processed': total_records
             }
+            if stale_ids is not None:
+                stats['stale_ids'] = stale_ids
             
             print("\n✅ Atualização concluída!")
             print(f"   📥 Novos registros inseridos/atualizados: {new_records}")